@@ -435,6 +435,45 @@ def encode_value(
     return v
 
 
+def fold_constants(data: List[Value], max_size: int = 256) -> List[Value]:
+    """Merge runs of adjacent concrete values in encoded data into single
+    constants. ABI encoding produces a lot of small constants (padding,
+    offsets, lengths) and merging them reduces the number of values
+    the symbolic engine has to concatenate when reading the data
+
+    :param data: list of abstract Values to fold
+    :param max_size: maximal size in bits of a folded constant
+    :return: the folded list of Values
+    """
+    no_vars = VarContext()
+    res: List[Value] = []
+    # Pending run of constants as a (size, value) tuple
+    run_size, run_val = 0, 0
+
+    def _flush() -> None:
+        if not run_size:
+            return
+        # Maat only builds constants wider than 64 bits from strings
+        if run_size <= 64:
+            res.append(Cst(run_size, run_val))
+        else:
+            res.append(Cst(run_size, f"{run_val:x}", 16))
+
+    for v in data:
+        if v.is_symbolic(no_vars) or v.size > max_size:
+            _flush()
+            run_size, run_val = 0, 0
+            res.append(v)
+            continue
+        if run_size + v.size > max_size:
+            _flush()
+            run_size, run_val = 0, 0
+        run_val = (run_val << v.size) | v.as_uint()
+        run_size += v.size
+    _flush()
+    return res
+
+
 def encode_arguments(
     ty: TupleType, ctx: VarContext, tx_name: str, *args
 ) -> List[Value]:
@@ -491,8 +530,9 @@ def function_call(
     func_prototype = func_signature(func, args_spec)
     res = [selector(func_prototype)]
 
-    # encode the arguments too
-    res += encode_arguments(args_types, ctx, tx_name, *args)
+    # encode the arguments too. The selector is kept as a separate
+    # value because coverage tracking reads it from the first value
+    res += fold_constants(encode_arguments(args_types, ctx, tx_name, *args))
 
     # TODO (montyly): This can be removed, but maybe we want to keep it for debugging?
     # pylint: disable=unused-variable
@@ -0,0 +1,63 @@
+import hashlib
+import os
+import pickle
+from typing import Any, Optional
+
+from .logger import logger
+
+
+def get_cache_dir() -> str:
+    """Return the directory where Optik caches analysis results"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "optik")
+
+
+def get_cache_file(kind: str, name: str) -> str:
+    """Return the file where results of type 'kind' are cached for 'name',
+    for example the Slither analysis of a given Solidity file"""
+    h = hashlib.sha256(name.encode()).hexdigest()
+    return os.path.join(get_cache_dir(), f"{kind}-{h}.pkl")
+
+
+def load_cache(cache_file: str, key: Any) -> Optional[Any]:
+    """Load the data stored in a cache file, or return None if the file
+    doesn't exist, can't be loaded, or was stored for a different key.
+
+    The key is compared before unpickling the data, so that data stored for
+    another key is never loaded
+
+    :param cache_file: the cache file, as returned by get_cache_file()
+    :param key: the key for which the cached data must have been stored
+    """
+    if not os.path.isfile(cache_file):
+        return None
+    try:
+        with open(cache_file, "rb") as f:
+            if pickle.load(f) != key:
+                logger.debug(f"Ignoring outdated cache {cache_file}")
+                return None
+            return pickle.load(f)
+    except Exception as e:
+        logger.debug(f"Failed to load cache {cache_file}: {e}")
+        return None
+
+
+def store_cache(cache_file: str, key: Any, data: Any) -> None:
+    """Store data in a cache file, along with the key for which it is valid.
+    Caching is best effort, errors are logged and ignored
+
+    :param cache_file: the cache file, as returned by get_cache_file()
+    :param key: the key to check when loading the data back
+    :param data: the data to cache
+    """
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(cache_file, "wb") as f:
+            pickle.dump(key, f)
+            pickle.dump(data, f)
+    except Exception as e:
+        logger.debug(f"Failed to write cache {cache_file}: {e}")
+        if os.path.exists(cache_file):
+            os.remove(cache_file)
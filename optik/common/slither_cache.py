@@ -0,0 +1,80 @@
+import os
+import subprocess
+from typing import Dict
+
+from slither.slither import Slither
+
+from .logger import logger
+from .cache import get_cache_file, load_cache, store_cache
+
+
+def _package_version(name: str) -> str:
+    """Return the installed version of package 'name'"""
+    try:
+        from importlib.metadata import version
+    except ImportError:  # Python < 3.8
+        from pkg_resources import get_distribution
+
+        return get_distribution(name).version
+    return version(name)
+
+
+def _solc_version() -> str:
+    """Return the version of the solc binary currently selected, or an empty
+    string if it can't be run"""
+    try:
+        p = subprocess.run(
+            ["solc", "--version"], capture_output=True, text=True, check=False
+        )
+    except OSError:
+        return ""
+    return p.stdout.strip()
+
+
+def _analysis_environment() -> Dict[str, str]:
+    """Return the versions of the tools that produce the Slither analysis.
+    A cached analysis can only be loaded by the same versions of Slither and
+    crytic-compile, and is only valid for the same compiler"""
+    return {
+        "slither": _package_version("slither-analyzer"),
+        "crytic-compile": _package_version("crytic-compile"),
+        "solc": _solc_version(),
+    }
+
+
+def _is_up_to_date(slither: Slither) -> bool:
+    """Return True if none of the source files analyzed by 'slither'
+    changed since the analysis"""
+    for path, content in slither.source_code.items():
+        try:
+            with open(path, "r", encoding="utf8", newline="") as f:
+                if f.read() != content:
+                    return False
+        except OSError:
+            return False
+    return True
+
+
+def load_slither(filename: str, use_cache: bool = True) -> Slither:
+    """Run Slither on a file, or load the result of a previous analysis
+    from the cache if the source files, the Slither and crytic-compile
+    versions, and the solc version didn't change since
+
+    :param filename: the Solidity file to analyze
+    :param use_cache: if False, always run Slither and don't update the cache
+    """
+    if not use_cache:
+        return Slither(filename)
+
+    cache_file = get_cache_file("slither", os.path.abspath(filename))
+    environment = _analysis_environment()
+    slither = load_cache(cache_file, environment)
+    if isinstance(slither, Slither) and _is_up_to_date(slither):
+        logger.debug(f"Loaded Slither analysis from cache {cache_file}")
+        return slither
+
+    slither = Slither(filename)
+    # Not all Slither objects can be pickled, in which case the analysis is
+    # simply not cached
+    store_cache(cache_file, environment, slither)
+    return slither
@@ -0,0 +1,57 @@
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+from maat import Constraint, VarContext
+
+
+class SolverCache:
+    """Cache of solver results for sets of path constraints. Input sequences
+    that share a common prefix produce bifurcations with identical or
+    overlapping constraint sets, so results can be reused across them:
+
+        - if a set of constraints is a superset of a set that was proven
+          unsatisfiable, it is unsatisfiable as well
+        - if the exact same set of constraints was already solved, its model
+          can be reused as is
+
+    Constraints are identified by their string representation. Unsatisfiable
+    sets are indexed by one of their constraints, so that checking a set only
+    compares it with the unsatisfiable sets indexed by its own constraints.
+    Each set is indexed by the constraint that indexes the fewest sets, to
+    avoid piling up sets under the path constraints shared by many queries.
+
+    Attributes:
+        sat     A dict mapping constraint sets to the model that satisfies them
+        unsat   A dict mapping constraints to the unsatisfiable constraint sets
+                they index
+    """
+
+    def __init__(self) -> None:
+        self.sat: Dict[FrozenSet[str], VarContext] = {}
+        self.unsat: Dict[str, List[FrozenSet[str]]] = {}
+
+    @staticmethod
+    def key(constraints: Iterable[Constraint]) -> FrozenSet[str]:
+        """Return the cache key for a set of constraints"""
+        return frozenset(str(c) for c in constraints)
+
+    def is_unsat(self, key: FrozenSet[str]) -> bool:
+        """Return True if the constraints are known to be unsatisfiable"""
+        for constraint in key:
+            for unsat in self.unsat.get(constraint, ()):
+                if unsat <= key:
+                    return True
+        return False
+
+    def get_model(self, key: FrozenSet[str]) -> Optional[VarContext]:
+        """Return a cached model for the constraints, or None"""
+        return self.sat.get(key)
+
+    def add_sat(self, key: FrozenSet[str], model: VarContext) -> None:
+        """Record a model satisfying the constraints"""
+        self.sat[key] = model
+
+    def add_unsat(self, key: FrozenSet[str]) -> None:
+        """Record that the constraints are unsatisfiable. 'key' must not be
+        empty"""
+        constraint = min(key, key=lambda c: len(self.unsat.get(c, ())))
+        self.unsat.setdefault(constraint, []).append(key)
@@ -1,4 +1,5 @@
 import ast
+import functools
 import re
 from typing import Union, List, Tuple
 import os
@@ -229,9 +230,11 @@ def int_to_bool(arg: int) -> bool:
     return arg != 0
 
 
+@functools.lru_cache(maxsize=4096)
 def compute_new_contract_addr(sender: int, nonce: int) -> int:
     """Compute a new contract address as generated by the CREATE instruction
-    originating from 'sender' with nonce 'nonce'"""
+    originating from 'sender' with nonce 'nonce'. Results are cached since
+    the same (sender, nonce) pairs are hit again when replaying inputs"""
 
     k = sha3.keccak_256()
     k.update(rlp.encode([sender.to_bytes(20, "big"), nonce]))
@@ -1,5 +1,6 @@
+from collections import deque
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Union
+from typing import Deque, Dict, List, Optional, Set, Union
 
 from maat import (
     allow_symbolic_keccak,
@@ -29,6 +30,15 @@ from maat import (
 from .exceptions import WorldException
 from .util import compute_new_contract_addr
 
+# Maat constants used in EVMWorld.run(), bound once at module level
+_STOP_EXIT = STOP.EXIT
+_STOP_NONE = STOP.NONE
+_TX_RES_REVERT = TX_RES.REVERT
+_TX_RES_SUCCESS = (TX_RES.STOP, TX_RES.RETURN)
+_TX_CREATE_TYPES = (TX.CREATE, TX.CREATE2)
+_TX_CALL_TYPES = (TX.CALL, TX.STATICCALL, TX.DELEGATECALL)
+_TX_CALL_RETURN_TYPES = (TX.CALL, TX.CALLCODE, TX.DELEGATECALL, TX.STATICCALL)
+
 
 @dataclass(frozen=True)
 class AbstractTx:
@@ -41,6 +51,8 @@ class AbstractTx:
         ctx     The symbolic context associated with tx.data
     """
 
+    __slots__ = ("tx", "block_num_inc", "block_timestamp_inc", "ctx")
+
     tx: Optional[EVMTransaction]
     block_num_inc: Value
     block_timestamp_inc: Value
@@ -51,10 +63,16 @@ class EVMRuntime:
     """A wrapper class for executing a single transaction in a deployed
     contract"""
 
+    __slots__ = ("engine", "init_state")
+
     def __init__(self, engine: MaatEngine, tx: Optional[AbstractTx]):
         self.engine = engine
         if tx:
-            # Load the var context of the transaction in the engine
+            # Load the var context of the transaction in the engine.
+            # Note: the concrete values are deliberately not substituted
+            # in the transaction data. The variables must remain symbolic
+            # in path constraints so that they can be solved to generate
+            # new inputs
             self.engine.vars.update_from(tx.ctx)
             # Set transaction data in contract
             contract(self.engine).transaction = tx.tx
@@ -73,10 +91,30 @@ class EVMRuntime:
         self.engine.restore_snapshot(self.init_state, remove=False)
 
 
+def _make_envp(
+    address: int, deployer: int, run_init_bytecode: bool
+) -> Dict[str, str]:
+    """Build the environment passed to Maat when loading a contract"""
+    env = {"address": f"{address:x}", "deployer": f"{deployer:x}"}
+    if not run_init_bytecode:
+        # Set "no_run_init_bytecode" to anything to tell Maat to not
+        # run the init bytecode
+        env["no_run_init_bytecode"] = "1"
+    return env
+
+
 class ContractRunner:
     """A wrapper class that offers an interface to deploy a contract and
     handle execution of several transactions with potential re-entrency"""
 
+    __slots__ = (
+        "root_engine",
+        "runtime_stack",
+        "nonce",
+        "address",
+        "initialized",
+    )
+
     def __init__(
         self,
         root_engine: MaatEngine,
@@ -100,16 +138,10 @@ class ContractRunner:
         self.address = address
 
         # Load the contract the new symbolic engine
-        env = {"address": f"{address:x}", "deployer": f"{deployer:x}"}
-        if not run_init_bytecode:
-            # Set "no_run_init_bytecode" to anything to tell Maat to not
-            # run the init bytecode
-            env["no_run_init_bytecode"] = "1"
-
         self.root_engine.load(
             contract_file,
             args=args,
-            envp=env,
+            envp=_make_envp(address, deployer, run_init_bytecode),
         )
 
         # Whether the init bytecode has been run or not
@@ -147,6 +179,8 @@ class WorldMonitor:
     """Abstract interface for monitors that can execute callbacks on
     certain events"""
 
+    __slots__ = ("world",)
+
     def __init__(self) -> None:
         self.world: Optional["EVMWorld"] = None
 
@@ -177,7 +211,7 @@ class EVMWorld:
         call_stack      A stack holding the addresses of the contracts in which
                         method calls are currently being executed. The same address
                         can appear twice in case of re-entrency
-        tx_queue        A list of transactions to execute
+        tx_queue        A FIFO queue of transactions to execute
         current_tx      Transaction currently being run
         monitors        A list of WorldMonitor that can execute callbacks on
                         various events
@@ -187,9 +221,15 @@ class EVMWorld:
         self.eoa_list: Dict[int, Value] = {}
         self.contracts: Dict[int, ContractRunner] = {}
         self.call_stack: List[int] = []
-        self.tx_queue: List[AbstractTx] = []
+        # Runner of the contract at the top of the call stack. Must be
+        # updated along with call_stack, see _push_frame() and _pop_frame()
+        self._current_runner: Optional[ContractRunner] = None
+        self.tx_queue: Deque[AbstractTx] = deque()
         self.current_tx: Optional[AbstractTx] = None
         self.monitors: List[WorldMonitor] = []
+        # Set of attached monitors for fast membership checks. 'monitors'
+        # is kept to dispatch events in attach order
+        self._monitor_set: Set[WorldMonitor] = set()
         self.static_flag_stack: List[bool] = []
         # Counter for transactions being run
         self._current_tx_num: int = 0
@@ -261,16 +301,13 @@ class EVMWorld:
     def push_transactions(self, tx_list: List[AbstractTx]) -> None:
         """Add a list of transactions in the transaction queue. The transactions
         are executed in the order they have in the list"""
-        for tx in tx_list:
-            self.push_transaction(tx)
+        self.tx_queue.extend(tx_list)
 
     def next_transaction(self) -> AbstractTx:
         """Return the next transaction to execute and remove it from the
         transaction queue"""
         # Dequeue next tx
-        res = self.tx_queue[0]
-        self.tx_queue.pop(0)
-        return res
+        return self.tx_queue.popleft()
 
     @property
     def current_tx_num(self) -> int:
@@ -288,9 +325,9 @@ class EVMWorld:
     @property
     def current_contract(self) -> ContractRunner:
         """Return the contract currently being executed"""
-        if not self.call_stack:
+        if self._current_runner is None:
             raise WorldException("No contract being currently executed")
-        return self.contracts[self.call_stack[-1]]
+        return self._current_runner
 
     def get_contract(self, address: int) -> ContractRunner:
         """Return the contract deployed at 'address'"""
@@ -303,6 +340,18 @@ class EVMWorld:
         """Return the MaatEngine in which code is currently being executed"""
         return self.current_contract.current_runtime.engine
 
+    def _push_frame(self, runner: ContractRunner) -> None:
+        """Push a contract on top of the call stack"""
+        self.call_stack.append(runner.address)
+        self._current_runner = runner
+
+    def _pop_frame(self) -> None:
+        """Remove the contract at the top of the call stack"""
+        self.call_stack.pop()
+        self._current_runner = (
+            self.contracts[self.call_stack[-1]] if self.call_stack else None
+        )
+
     def _push_runtime(
         self,
         runner: ContractRunner,
@@ -346,50 +395,48 @@ class EVMWorld:
                         f"Transaction recipient is {contract_addr}, but no contract is deployed there"
                     ) from e
                 # Create new runtime to run this transaction
-                self._push_runtime(runner, self.current_tx)
+                rt: EVMRuntime = self._push_runtime(runner, self.current_tx)
                 # Add to call stack
-                self.call_stack.append(contract_addr)
+                self._push_frame(runner)
                 # Monitor events
                 self._on_event(
                     "transaction",
-                    contract(runner.current_runtime.engine).transaction,
+                    contract(rt.engine).transaction,
                 )
+            else:
+                runner = self.current_contract
+                rt = runner.current_runtime
 
-            # Get current runtime and run
-            rt: EVMRuntime = self.current_contract.current_runtime
+            # Run current runtime
             info = rt.run()
             stop = info.stop
+            ctr = contract(rt.engine)
             # Check stop reason
-            if stop == STOP.EXIT:
-                succeeded: bool = info.exit_status.as_uint() in [
-                    TX_RES.STOP,
-                    TX_RES.RETURN,
-                ]
+            if stop == _STOP_EXIT:
+                # Note: doing exit_status.as_uint() is safe here because
+                # exit_status will never be symbolic for the EVM architecture
+                exit_status = info.exit_status.as_uint()
+                succeeded: bool = exit_status in _TX_RES_SUCCESS
 
                 # Set transaction result in potential caller contract
-                is_msg_call_return = False
+                caller_contract: Optional[EVMContract] = None
                 if len(self.call_stack) >= 2:
-                    caller = contract(
+                    caller_contract = contract(
                         self.contracts[
                             self.call_stack[-2]
                         ].current_runtime.engine
                     )
-                    caller.result_from_last_call = contract(
-                        rt.engine
-                    ).transaction.result
-                    is_msg_call_return = True
+                    caller_contract.result_from_last_call = (
+                        ctr.transaction.result
+                    )
                 # Handle revert. WARNING: Once we revert the state, 'info' is
                 # no more valid, because it is restored as well
-                # Note: doing exit_status.as_uint() is safe here because
-                # exit_status will never be symbolic for the EVM architecture
-                if info.exit_status.as_uint() == TX_RES.REVERT:
+                if exit_status == _TX_RES_REVERT:
                     rt.revert()
 
                 # If contract was still initializing, handle success/failure
-                create_failed = (
-                    not self.current_contract.initialized
-                ) and not succeeded
-                if not self.current_contract.initialized:
+                create_failed = (not runner.initialized) and not succeeded
+                if not runner.initialized:
                     # This pushes the success status in the caller contract
                     # stack, and deletes the contract runner for current_contract
                     # if the contract creation failed
@@ -400,43 +447,37 @@ class EVMWorld:
                 # _handle_CREATE_after will have deleted the entire contract runner
                 #  already
                 if not create_failed:
-                    self.current_contract.pop_runtime()
+                    runner.pop_runtime()
 
                 # Handle call result in potential caller contract
-                if is_msg_call_return:
-                    caller_contract = contract(
-                        self.contracts[
-                            self.call_stack[-2]
-                        ].current_runtime.engine
-                    )
+                if caller_contract is not None:
                     # Handle return of call
-                    if caller_contract.outgoing_transaction.type in [
-                        TX.CALL,
-                        TX.CALLCODE,
-                        TX.DELEGATECALL,
-                        TX.STATICCALL,
-                    ]:
+                    if (
+                        caller_contract.outgoing_transaction.type
+                        in _TX_CALL_RETURN_TYPES
+                    ):
                         self._handle_CALL_after(caller_contract, succeeded)
 
                     # Reset outgoing_transaction in caller
                     caller_contract.outgoing_transaction = None
 
                 # Remove current contract from callstack
-                self.call_stack.pop()
+                self._pop_frame()
 
-            elif stop == STOP.NONE and contract(rt.engine).outgoing_transaction:
-                out_tx = contract(rt.engine).outgoing_transaction
+            elif stop == _STOP_NONE and ctr.outgoing_transaction:
+                out_tx = ctr.outgoing_transaction
+                out_tx_type = out_tx.type
                 # Increment global transaction count
                 self.current_tx_num += 1
                 # Handle message call
-                if out_tx.type in [TX.CREATE, TX.CREATE2]:
-                    self._handle_CREATE()
-                elif out_tx.type in [TX.CALL, TX.STATICCALL, TX.DELEGATECALL]:
+                if out_tx_type in _TX_CREATE_TYPES:
+                    self._handle_CREATE(runner, rt, out_tx)
+                elif out_tx_type in _TX_CALL_TYPES:
                     # Handle ETH transfers to EOAs
                     if not self.is_contract(out_tx.recipient):
-                        self._handle_ETH_transfer()
+                        self._handle_ETH_transfer(ctr)
                     else:
-                        self._handle_CALL()
+                        self._handle_CALL(rt, out_tx)
                 # TODO(boyan): other tx types, CALLCODE, DELEGATECALL, ...
                 else:
                     raise WorldException(
@@ -449,20 +490,24 @@ class EVMWorld:
 
         return stop
 
-    def _handle_CREATE(self) -> None:
+    def _handle_CREATE(
+        self, runner: ContractRunner, rt: EVMRuntime, out_tx: EVMTransaction
+    ) -> None:
         """Handle deployment of a new contract by another contract with
         the CREATE or CREATE2 EVM instructions. This method deploys the new
         contract without running the init bytecode, and pushes it at the top
-        of the call stack, so it will be the next contract to run."""
+        of the call stack, so it will be the next contract to run.
 
-        rt: EVMRuntime = self.current_contract.current_runtime
-        out_tx = contract(rt.engine).outgoing_transaction
+        :param runner: the current contract, that emitted the CREATE
+        :param rt: the current runtime of 'runner'
+        :param out_tx: the outgoing transaction emitted by 'rt'
+        """
         deployer = out_tx.sender.as_uint(rt.engine.vars)
 
         # Get address of new contract
         if out_tx.type == TX.CREATE:
             new_contract_addr = compute_new_contract_addr(
-                deployer, self.current_contract.nonce
+                deployer, runner.nonce
             )
         else:
             # TODO(boyan): support CREATE2
@@ -470,7 +515,7 @@ class EVMWorld:
                 f"Transaction type {out_tx.type} not implemented"
             )
         # Increment caller nonce
-        self.current_contract.nonce += 1
+        runner.nonce += 1
 
         # Deploy contract without running the init bytecode
         contract_runner = self.deploy(
@@ -491,7 +536,7 @@ class EVMWorld:
             VarContext(),
         )
         self._push_runtime(contract_runner, create_tx)
-        self.call_stack.append(new_contract_addr)
+        self._push_frame(contract_runner)
 
     def _handle_CREATE_after(self, succeeded: bool) -> None:
         """Handles returning from a CREATE message call. In case of
@@ -526,12 +571,13 @@ class EVMWorld:
                 self.contracts[self.call_stack[-2]].current_runtime.engine
             ).stack.push(Cst(256, create_result))
 
-    def _handle_ETH_transfer(self) -> None:
+    def _handle_ETH_transfer(self, caller: EVMContract) -> None:
         """Handles a message call that transfers ETH to an Externally
         Owned Account. When calling this method the current active
-        contract must be the caller that sends ETH to the EOA"""
-        rt: EVMRuntime = self.current_contract.current_runtime
-        caller: EVMContract = contract(rt.engine)
+        contract must be the caller that sends ETH to the EOA
+
+        :param caller: the EVM contract of the current runtime
+        """
         out_tx = caller.outgoing_transaction
         # Create sender EOA if needed
         if out_tx.recipient in self.contracts:
@@ -546,16 +592,17 @@ class EVMWorld:
         # Push 1 on the caller's stack to indicate success
         caller.stack.push(Cst(256, 1))
 
-    def _handle_CALL(self) -> None:
+    def _handle_CALL(self, rt: EVMRuntime, out_tx: EVMTransaction) -> None:
         """Handles message call into another contract. This method
         creates a new transaction and a new runtime for the target
         contract, and pushes it at the top of the call stack, so it
-        will be the next contract to run"""
+        will be the next contract to run
 
-        rt: EVMRuntime = self.current_contract.current_runtime
-        out_tx = contract(rt.engine).outgoing_transaction
+        :param rt: the current runtime
+        :param out_tx: the outgoing transaction emitted by 'rt'
+        """
         share_storage_uid = (
-            self.current_engine.uid if out_tx.type == TX.DELEGATECALL else None
+            rt.engine.uid if out_tx.type == TX.DELEGATECALL else None
         )
 
         # Get runner for target contract
@@ -575,7 +622,7 @@ class EVMWorld:
             VarContext(),
         )
         self._push_runtime(contract_runner, tx, share_storage_uid)
-        self.call_stack.append(contract_runner.address)
+        self._push_frame(contract_runner)
         self.static_flag_stack.append(evm_get_static_flag(self.root_engine))
 
     def _handle_CALL_after(
@@ -641,16 +688,18 @@ class EVMWorld:
 
     def attach_monitor(self, monitor: WorldMonitor, *args, **kwargs) -> None:
         """Attach a WorldMonitor"""
-        if monitor in self.monitors:
+        if monitor in self._monitor_set:
             raise WorldException("Monitor already attached")
+        self._monitor_set.add(monitor)
         self.monitors.append(monitor)
         monitor.world = self
         monitor.on_attach(*args, **kwargs)
 
     def detach_monitor(self, monitor: WorldMonitor) -> None:
         """Detach a WorldMonitor"""
-        if monitor not in self.monitors:
+        if monitor not in self._monitor_set:
             raise WorldException("Monitor was not attached")
+        self._monitor_set.discard(monitor)
         self.monitors.remove(monitor)
 
     def _on_event(self, event_name: str, *args) -> None:
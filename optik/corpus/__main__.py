@@ -1,9 +1,9 @@
 import argparse
 import sys
 from typing import List
-from slither.slither import Slither
 from .generator import EchidnaCorpusGenerator
 from ..common.logger import logger
+from ..common.slither_cache import load_slither
 from ..common.exceptions import CorpusException
 
 
@@ -11,17 +11,23 @@ def run_feed_echidna(arguments: List[str]) -> None:
     """Main corpus generation script"""
 
     args = parse_arguments(arguments)
-    slither = Slither(args.FILE)
+    slither = load_slither(args.FILE, use_cache=not args.no_slither_cache)
     gen = EchidnaCorpusGenerator(args.contract, slither)
     logger.info(f"Getting transaction templates from {args.corpus_dir}...")
-    gen.init_func_template_mapping(args.corpus_dir)
+    gen.init_func_template_mapping(
+        args.corpus_dir, use_cache=not args.no_template_cache
+    )
+    # Collect sequences for all depths and write them in a single pass
+    new_tx_sequences = []
+    for _ in range(args.depth - 1):
+        gen.step()
+        new_tx_sequences += gen.current_tx_sequences
     new_inputs_cnt = 0
     try:
-        for _ in range(args.depth - 1):
-            gen.step()
-            new_inputs_cnt += len(gen.current_tx_sequences)
-            gen.dump_tx_sequences(args.corpus_dir)
+        gen.dump_tx_sequences(args.corpus_dir, new_tx_sequences)
+        new_inputs_cnt = len(new_tx_sequences)
     except CorpusException as e:
+        # Nothing was written
         logger.error(f"Error generating new seeds: {str(e)}")
 
     logger.info(
@@ -69,6 +75,18 @@ def parse_arguments(args: List[str]) -> argparse.Namespace:
         required=True,
     )
 
+    parser.add_argument(
+        "--no-slither-cache",
+        action="store_true",
+        help="Always run Slither instead of reusing the analysis cached from previous runs",
+    )
+
+    parser.add_argument(
+        "--no-template-cache",
+        action="store_true",
+        help="Always read transaction templates from the corpus instead of reusing the ones cached from previous runs",
+    )
+
     return parser.parse_args(args)
 
 
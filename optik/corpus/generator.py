@@ -1,34 +1,78 @@
+import hashlib
 import json
 import os
-from typing import List, Dict, Final, Optional
+import re
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+from typing import Dict, Final, Iterator, List, Optional, Tuple
 
 from slither.slither import SlitherCore
 
 from ..common.abi import func_signature
 from ..common.exceptions import CorpusException
 from ..common.logger import logger
+from ..common.cache import get_cache_file, load_cache, store_cache
 from ..dataflow.dataflow import (
     DataflowGraph,
     DataflowNode,
     get_base_dataflow_graph,
 )
 from ..echidna.interface import (
+    count_txs_in_corpus_file,
     extract_func_from_call,
-    get_available_filename,
 )
 
 # Prefix for files containing seed corpus
 SEED_CORPUS_PREFIX: Final[str] = "optik_corpus"
+_SEED_FILENAME_REGEX = re.compile(rf"{SEED_CORPUS_PREFIX}_(\d+)\.txt")
 
-# TODO: remove?
-# import itertools
-# def all_combinations(choices: Set[Any]) -> List[List[Any]]:
-#     res = [
-#         list(x)
-#         for r in range(1, len(choices) + 1)
-#         for x in itertools.combinations(choices, r)
-#     ]
-#     return res
+
+class TxSequence:
+    """An immutable sequence of dataflow nodes representing a sequence of
+    transactions. Sequences are grown by prepending calls, so they are stored
+    as linked lists that share their tail with the sequence they were created
+    from, which makes prepending O(1)
+
+    Attributes:
+        head: first node of the sequence
+        tail: the rest of the sequence, or None
+    """
+
+    __slots__ = ("head", "tail", "_len", "_impacted_by")
+
+    def __init__(self, head: DataflowNode, tail: Optional["TxSequence"] = None):
+        self.head = head
+        self.tail = tail
+        self._len: int = 1 if tail is None else len(tail) + 1
+        self._impacted_by: Optional[Tuple[DataflowNode, ...]] = None
+
+    def prepend(self, node: DataflowNode) -> "TxSequence":
+        """Return a new sequence with 'node' prepended to this one"""
+        return TxSequence(node, self)
+
+    @property
+    def impacted_by(self) -> Tuple[DataflowNode, ...]:
+        """All nodes that modify data used by a node of the sequence, without
+        duplicates and in a deterministic order. Computed once per sequence,
+        from the value cached by its tail"""
+        if self._impacted_by is None:
+            if self.tail is None:
+                self._impacted_by = tuple(self.head.parents.values())
+            else:
+                # dict keys keep the first occurrence of each node, in order
+                impacted_by = dict.fromkeys(self.tail.impacted_by)
+                impacted_by.update(dict.fromkeys(self.head.parents.values()))
+                self._impacted_by = tuple(impacted_by)
+        return self._impacted_by
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[DataflowNode]:
+        seq: Optional[TxSequence] = self
+        while seq is not None:
+            yield seq.head
+            seq = seq.tail
 
 
 class CorpusGenerator:
@@ -40,13 +84,15 @@ class CorpusGenerator:
             contract_name, slither
         )
         self.func_template_mapping: Dict[str, DataflowNode] = {}
-        self.current_tx_sequences: List[List[DataflowNode]] = []
+        self.current_tx_sequences: List[TxSequence] = []
         # Initialize basic set of 1-tx sequences
         self._init()
 
     def _init(self) -> None:
         """Create initial set of sequences of 1 transaction each"""
-        self.current_tx_sequences = [[n] for n in self.dataflow_graph.nodes]
+        self.current_tx_sequences = [
+            TxSequence(n) for n in self.dataflow_graph.nodes
+        ]
 
     @property
     def current_seq_len(self) -> int:
@@ -61,10 +107,10 @@ class CorpusGenerator:
         more details"""
         new_tx_sequences = []
         for tx_seq in self.current_tx_sequences:
-            # Get all txs that can impact this sequence
-            impacts_seq = set().union(*[n.parents for n in tx_seq])
-            # Prepend impacting tx(s) to sequence
-            new_tx_sequences += [[prev] + tx_seq for prev in impacts_seq]
+            # Prepend tx(s) that can impact this sequence
+            new_tx_sequences += [
+                tx_seq.prepend(prev) for prev in tx_seq.impacted_by
+            ]
         self.current_tx_sequences = new_tx_sequences
 
     def step(self, n: int = 1) -> None:
@@ -76,37 +122,66 @@ class CorpusGenerator:
         for _ in range(n):
             self._step()
 
-    def dump_tx_sequences(self, corpus_dir: str) -> None:
-        """Dump the current dataflow tx sequences in new corpus input files"""
+    def dump_tx_sequences(
+        self,
+        corpus_dir: str,
+        tx_sequences: Optional[List[TxSequence]] = None,
+    ) -> None:
+        """Dump dataflow tx sequences in new corpus input files
+
+        :param corpus_dir: Corpus directory where to write new inputs
+        :param tx_sequences: Sequences to dump. Defaults to the current
+        tx sequences
+        """
         raise NotImplementedError()
 
     def __str__(self) -> str:
-        res = f"Dataflow graph:\n {self.dataflow_graph}\n"
-
-        res += "Current tx sequences:\n"
+        res = [
+            f"Dataflow graph:\n {self.dataflow_graph}\n",
+            "Current tx sequences:\n",
+        ]
         for i, tx_seq in enumerate(self.current_tx_sequences):
-            res += (
+            res.append(
                 f"{i}: "
                 + " -> ".join([node.func.name for node in tx_seq])
                 + "\n"
             )
 
-        return res
+        return "".join(res)
 
 
 class EchidnaCorpusGenerator(CorpusGenerator):
     """Corpus generator for Echidna"""
 
-    def init_func_template_mapping(self, corpus_dir: str) -> None:
+    def init_func_template_mapping(
+        self, corpus_dir: str, use_cache: bool = False
+    ) -> None:
         """Initialize the mapping between functions and their JSON
         serialized Echidna transaction data. This needs to be called
         before we can dump tx sequences into new inputs
 
         :param corpus_dir: Corpus directory
+        :param use_cache: reuse the mapping computed by a previous run if the
+        corpus inputs didn't change since, and cache the new mapping otherwise
         """
-        for filename in os.listdir(corpus_dir):
-            with open(os.path.join(corpus_dir, filename), "rb") as f:
-                data = json.loads(f.read())
+        if use_cache:
+            cache_file = get_cache_file(
+                "templates", os.path.abspath(corpus_dir)
+            )
+            corpus_key = _template_cache_key(corpus_dir)
+            cached = load_cache(cache_file, corpus_key)
+            if cached is not None:
+                logger.debug(f"Loaded transaction templates from {cache_file}")
+                for func_prototype, tx in cached.items():
+                    self.func_template_mapping.setdefault(func_prototype, tx)
+                return
+
+        with os.scandir(corpus_dir) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                with open(entry.path, "rb") as f:
+                    data = json.loads(f.read())
                 for tx in data:
                     if tx["_call"]["tag"] == "NoCall":
                         continue
@@ -119,35 +194,111 @@ class EchidnaCorpusGenerator(CorpusGenerator):
                         continue
                     self.func_template_mapping[func_prototype] = tx
 
+        if use_cache:
+            store_cache(cache_file, corpus_key, self.func_template_mapping)
+
+    def _node_templates(self) -> Dict[int, str]:
+        """Return the JSON serialized Echidna tx template of every node of the
+        dataflow graph that has one, indexed by node id. Templates are shared
+        by many tx sequences, so they are looked up and serialized only once
+        here instead of for every sequence"""
+        res = {}
+        for node in self.dataflow_graph.nodes:
+            func_sig = node.func.solidity_signature
+            if func_sig in self.func_template_mapping:
+                res[id(node)] = json.dumps(self.func_template_mapping[func_sig])
+        return res
+
     def _dump_tx_sequence(
-        self, seq: List[DataflowNode], corpus_dir: str
+        self, seq: TxSequence, new_file: str, templates: Dict[int, str]
     ) -> None:
         """Write list of transaction sequences to corpus in Echidna's format
 
         :param sequence: List of sequential data flow nodes (functions)
-        :param corpus_dir: Corpus directory where to write new inputs
+        :param new_file: File where to write the new input
+        :param templates: serialized Echidna tx templates indexed by node id,
+        as returned by _node_templates(). Must contain all nodes of 'seq'
         """
-        seed = []
         # Retrieve Echidna tx for each function
-        for node in seq:
-            func_sig = node.func.solidity_signature
-            try:
-                seed.append(self.func_template_mapping[func_sig])
-            except KeyError:
-                raise CorpusException(f"No template for function {func_sig}")
+        seed = [templates[id(node)] for node in seq]
 
-        new_file = get_available_filename(
-            f"{corpus_dir}/{SEED_CORPUS_PREFIX}", ".txt"
-        )
-        # Write seed input in corpus
+        # Write seed input in corpus. This is the same output as
+        # json.dumps() on the list of templates
         logger.debug(f"Adding new corpus seed in {new_file}")
         with open(new_file, "w") as f:
-            json.dump(seed, f)
+            f.write("[" + ", ".join(seed) + "]")
+
+    def dump_tx_sequences(
+        self,
+        corpus_dir: str,
+        tx_sequences: Optional[List[TxSequence]] = None,
+    ) -> None:
+        """Dump dataflow tx sequences in new corpus input files
+
+        :param corpus_dir: Corpus directory where to write new inputs
+        :param tx_sequences: Sequences to dump. Defaults to the current
+        tx sequences
+        :raises CorpusException: if a function has no Echidna tx template. No
+        file is written in that case
+        """
+        if tx_sequences is None:
+            tx_sequences = self.current_tx_sequences
+        templates = self._node_templates()
+        # Check templates before writing any file, so that a failure doesn't
+        # leave only part of the sequences in the corpus
+        for seq in tx_sequences:
+            for node in seq:
+                if id(node) not in templates:
+                    raise CorpusException(
+                        f"No template for function {node.func.solidity_signature}"
+                    )
+        # Allocate all filenames upfront so that files can be written
+        # concurrently without racing for the same name
+        next_id = _next_seed_id(corpus_dir)
+        filenames = [
+            _seed_filename(corpus_dir, next_id + i)
+            for i in range(len(tx_sequences))
+        ]
+        # Writing files is pure I/O, which doesn't hold the GIL
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            # Consume the results so that exceptions are propagated
+            list(
+                executor.map(
+                    self._dump_tx_sequence,
+                    tx_sequences,
+                    filenames,
+                    repeat(templates),
+                )
+            )
+
+
+def _next_seed_id(corpus_dir: str) -> int:
+    """Return a seed file number greater than the numbers of all existing
+    seed files in 'corpus_dir'"""
+    res = 0
+    for filename in os.listdir(corpus_dir):
+        match = _SEED_FILENAME_REGEX.fullmatch(filename)
+        if match:
+            res = max(res, int(match.group(1)) + 1)
+    return res
 
-    def dump_tx_sequences(self, corpus_dir: str) -> None:
-        """Dump the current dataflow tx sequences in new corpus input files"""
-        for seq in self.current_tx_sequences:
-            self._dump_tx_sequence(seq, corpus_dir)
+
+def _seed_filename(corpus_dir: str, num: int) -> str:
+    """Return the name of the seed file number 'num' in 'corpus_dir'"""
+    return os.path.join(corpus_dir, f"{SEED_CORPUS_PREFIX}_{num}.txt")
+
+
+def _template_cache_key(corpus_dir: str) -> str:
+    """Return a key identifying the inputs in 'corpus_dir' that can provide
+    transaction templates. Echidna names corpus files after their content.
+    Seeds generated by Optik are ignored since they only contain existing
+    templates"""
+    names = sorted(
+        f
+        for f in os.listdir(corpus_dir)
+        if not f.startswith(SEED_CORPUS_PREFIX)
+    )
+    return hashlib.sha256("\n".join(names).encode()).hexdigest()
 
 
 def infer_previous_incremental_threshold(corpus_dir: str) -> int:
@@ -162,12 +313,12 @@ def infer_previous_incremental_threshold(corpus_dir: str) -> int:
     logger.debug(
         f"Infering previous incremental threshold from corpus dir {corpus_dir}"
     )
-    for filename in reversed(list(os.listdir(corpus_dir))):
-        if not filename.startswith(SEED_CORPUS_PREFIX):
-            continue
-
-        with open(os.path.join(corpus_dir, filename), "rb") as f:
-            data = json.loads(f.read())
-            res = max(res, len(data))
+    with os.scandir(corpus_dir) as entries:
+        for entry in entries:
+            if not entry.name.startswith(SEED_CORPUS_PREFIX):
+                continue
+            if not entry.is_file():
+                continue
+            res = max(res, count_txs_in_corpus_file(entry.path))
 
     return res
@@ -1,29 +1,71 @@
-from typing import Dict, List, Optional
-from dataclasses import dataclass
+from collections import defaultdict
+from operator import attrgetter
+from typing import Any, Callable, ClassVar, DefaultDict, List, Optional, Tuple
 from maat import Constraint, MaatEngine, EVENT, WHEN
 from ..common.exceptions import CoverageException
 from ..common.world import WorldMonitor, EVMRuntime
 
 
-@dataclass(eq=True, frozen=True)
 class CoverageState:
     """Abstract base class that represents a "state" in the sense of
     coverage. If we track instructions, a state can be the covered
     instruction addresses, if we track paths, a state can be an
     execution path, ...
 
+    States are created for every executed instruction, so they are plain
+    classes with __slots__ rather than dataclasses. They must be treated as
+    immutable: the tuple of fields that identifies a state and its hash are
+    computed once on creation, from all the public fields declared in the
+    __slots__ of the class and its parents. Child classes declare their
+    fields in __slots__ and set them before calling the parent constructor
+
     Attributes:
         contract    Address of the contract being run
         contract_is_initialized     Whether we are running the init bytecode or the runtime bytecode
     """
 
-    contract: int
-    contract_is_initialized: bool
+    __slots__ = ("contract", "contract_is_initialized", "_key", "_hash")
+
+    # Returns the tuple of fields identifying a state
+    _get_key: ClassVar[Callable[[Any], Tuple]] = attrgetter(
+        "contract", "contract_is_initialized"
+    )
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        fields = [
+            field
+            for c in reversed(cls.__mro__)
+            for field in c.__dict__.get("__slots__", ())
+            if not field.startswith("_")
+        ]
+        cls._get_key = attrgetter(*fields)
+
+    def __init__(self, contract: int, contract_is_initialized: bool):
+        self.contract = contract
+        self.contract_is_initialized = contract_is_initialized
+        # Child classes set their fields before calling this constructor
+        self._key = type(self)._get_key(self)
+        self._hash = hash(self._key)
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            type(self) is type(other)
+            and self._hash == other._hash
+            and self._key == other._key
+        )
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}{self._key}"
 
 
-@dataclass(frozen=True)
 class Bifurcation:
-    """Dataclass recording a conditional branch point in code
+    """Immutable record of a conditional branch point in code. Bifurcations
+    are created for every symbolic branch, so this uses __slots__ instead of
+    a dataclass to keep instances small, and caches its hash
 
     Attributes
         inst_addr       Address of the branching instruction
@@ -35,13 +77,51 @@ class Bifurcation:
         alt_state       Optional. Coverage state of the bifurcation alt target
     """
 
+    __slots__ = (
+        "inst_addr",
+        "taken_target",
+        "alt_target",
+        "path_constraints",
+        "alt_target_constraint",
+        "input_uid",
+        "alt_state",
+        "_hash",
+    )
     inst_addr: int
     taken_target: int
     alt_target: int
-    path_constraints: List[Constraint]
+    path_constraints: Tuple[Constraint, ...]
     alt_target_constraint: Constraint
     input_uid: str
-    alt_state: Optional[CoverageState] = None
+    alt_state: Optional[CoverageState]
+    _hash: int
+
+    def __init__(
+        self,
+        inst_addr: int,
+        taken_target: int,
+        alt_target: int,
+        path_constraints: Tuple[Constraint, ...],
+        alt_target_constraint: Constraint,
+        input_uid: str,
+        alt_state: Optional[CoverageState] = None,
+    ):
+        # Bypass __setattr__, which forbids modifications
+        _set = object.__setattr__
+        _set(self, "inst_addr", inst_addr)
+        _set(self, "taken_target", taken_target)
+        _set(self, "alt_target", alt_target)
+        _set(self, "path_constraints", path_constraints)
+        _set(self, "alt_target_constraint", alt_target_constraint)
+        _set(self, "input_uid", input_uid)
+        _set(self, "alt_state", alt_state)
+        _set(self, "_hash", hash(alt_state))
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError(f"cannot assign to field '{name}'")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"cannot delete field '{name}'")
 
     def __eq__(self, other: object) -> bool:
         """Two bifurcations are equivalent if they branch to the same
@@ -52,7 +132,16 @@ class Bifurcation:
 
     def __hash__(self) -> int:
         """Custom hash based only on the target and transaction number"""
-        return hash(self.alt_state)
+        return self._hash
+
+    def __repr__(self) -> str:
+        return (
+            f"Bifurcation(inst_addr={self.inst_addr!r}, "
+            f"taken_target={self.taken_target!r}, "
+            f"alt_target={self.alt_target!r}, "
+            f"input_uid={self.input_uid!r}, "
+            f"alt_state={self.alt_state!r})"
+        )
 
 
 class Coverage(WorldMonitor):
@@ -75,11 +164,11 @@ class Coverage(WorldMonitor):
 
     def __init__(self) -> None:
         super().__init__()
-        self.covered: Dict[CoverageState, int] = {}
+        self.covered: DefaultDict[CoverageState, int] = defaultdict(int)
         self.bifurcations: List[Bifurcation] = []
         self.current_input: str = "<unspecified>"
 
-    def get_state(self, **kwargs) -> CoverageState:
+    def get_state(self, inst_addr: int, engine: MaatEngine) -> CoverageState:
         """Abstract base method that returns the current coverage state"""
         raise CoverageException(
             "This method must be overloaded by child classes"
@@ -105,14 +194,14 @@ class Coverage(WorldMonitor):
             alt_constr = b.cond
 
         # Record only if bifurcation to code that was not yet covered
-        alt_state = self.get_state(inst_addr=alt_target, engine=m)
+        alt_state = self.get_state(alt_target, m)
         if alt_state not in self.covered:
             self.bifurcations.append(
                 Bifurcation(
                     inst_addr=m.info.addr,
                     taken_target=taken_target,
                     alt_target=alt_target,
-                    path_constraints=list(
+                    path_constraints=tuple(
                         m.path.get_related_constraints(alt_constr)
                     ),
                     alt_target_constraint=alt_constr,
@@ -146,11 +235,17 @@ class Coverage(WorldMonitor):
         :param visit_max: Keep the bifurcations if they lead to instructions
         that have been visited at most 'visit_max'
         """
-        self.bifurcations = [
-            b
-            for b in self.bifurcations
-            if self.covered.get(b.alt_state, 0) <= visit_max
-        ]
+        if visit_max == 0:
+            # Common case, only keep bifurcations to uncovered states
+            self.bifurcations = [
+                b for b in self.bifurcations if b.alt_state not in self.covered
+            ]
+        else:
+            self.bifurcations = [
+                b
+                for b in self.bifurcations
+                if self.covered.get(b.alt_state, 0) <= visit_max
+            ]
 
     def sort_bifurcations(self) -> None:
         """Sort bifurcations according to their number of path constraints, from
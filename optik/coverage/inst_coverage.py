@@ -1,13 +1,17 @@
-from dataclasses import dataclass
-from typing import FrozenSet, Optional, List, Tuple
+from typing import Dict, FrozenSet, Optional, List, Tuple
 from maat import contract, MaatEngine, EVENT, WHEN
 from ..common.world import AbstractTx
 from .coverage import Coverage, CoverageState
 
 
-@dataclass(eq=True, frozen=True)
 class InstCoverageState(CoverageState):
-    inst_addr: int
+    __slots__ = ("inst_addr",)
+
+    def __init__(
+        self, contract: int, contract_is_initialized: bool, inst_addr: int
+    ):
+        self.inst_addr = inst_addr
+        super().__init__(contract, contract_is_initialized)
 
 
 class InstCoverage(Coverage):
@@ -31,15 +35,17 @@ class InstCoverage(Coverage):
 
     def record_exec(self, m: MaatEngine) -> None:
         """Record execution of instruction at 'addr'"""
-        state = self.get_state(inst_addr=m.info.addr, engine=m)
-        self.covered[state] = self.covered.get(state, 0) + 1
+        state = self.get_state(m.info.addr, m)
+        self.covered[state] += 1
 
-    def get_state(self, inst_addr: int, **kwargs) -> InstCoverageState:
+    def get_state(
+        self, inst_addr: int, engine: MaatEngine
+    ) -> InstCoverageState:
         assert self.world
-        # TODO (montyly) the class takes 1 parameter, but 3 are provided here?
+        ctr = self.world.current_contract
         return InstCoverageState(
-            self.world.current_contract.address,
-            self.world.current_contract.initialized,
+            ctr.address,
+            ctr.initialized,
             inst_addr,
         )
 
@@ -48,9 +54,18 @@ class InstCoverage(Coverage):
         cov.record_exec(m)
 
 
-@dataclass(eq=True, frozen=True)
 class InstTxCoverageState(InstCoverageState):
-    tx_num: int
+    __slots__ = ("tx_num",)
+
+    def __init__(
+        self,
+        contract: int,
+        contract_is_initialized: bool,
+        inst_addr: int,
+        tx_num: int,
+    ):
+        self.tx_num = tx_num
+        super().__init__(contract, contract_is_initialized, inst_addr)
 
 
 class InstTxCoverage(InstCoverage):
@@ -64,18 +79,30 @@ class InstTxCoverage(InstCoverage):
     def __init__(self) -> None:
         super().__init__()
 
-    def get_state(self, inst_addr: int, **kwargs) -> InstTxCoverageState:
+    def get_state(
+        self, inst_addr: int, engine: MaatEngine
+    ) -> InstTxCoverageState:
+        ctr = self.world.current_contract
         return InstTxCoverageState(
-            self.world.current_contract.address,
-            self.world.current_contract.initialized,
+            ctr.address,
+            ctr.initialized,
             inst_addr,
             self.world.current_tx_num,
         )
 
 
-@dataclass(eq=True, frozen=True)
 class InstSgCoverageState(InstCoverageState):
-    storage_use: FrozenSet[int]
+    __slots__ = ("storage_use",)
+
+    def __init__(
+        self,
+        contract: int,
+        contract_is_initialized: bool,
+        inst_addr: int,
+        storage_use: FrozenSet[int],
+    ):
+        self.storage_use = storage_use
+        super().__init__(contract, contract_is_initialized, inst_addr)
 
 
 class InstSgCoverage(InstCoverage):
@@ -92,29 +119,44 @@ class InstSgCoverage(InstCoverage):
 
     def __init__(self) -> None:
         super().__init__()
+        # Storage states seen so far. Storage rarely changes between
+        # instructions, so coverage states share the same frozenset objects
+        # instead of each holding their own copy
+        self._storage_states: Dict[FrozenSet[int], FrozenSet[int]] = {}
 
     def get_state(
-        self, inst_addr: int, engine: MaatEngine, **kwargs
+        self, inst_addr: int, engine: MaatEngine
     ) -> InstSgCoverageState:
+        ctr = self.world.current_contract
+        storage_use = frozenset(
+            [
+                addr
+                for addr, val in contract(engine).storage.used_slots()
+                if val.is_symbolic(engine.vars) or val.as_uint(engine.vars) != 0
+            ]
+        )
         return InstSgCoverageState(
-            self.world.current_contract.address,
-            self.world.current_contract.initialized,
+            ctr.address,
+            ctr.initialized,
             inst_addr,
-            frozenset(
-                [
-                    addr
-                    for addr, val in contract(engine).storage.used_slots()
-                    if val.is_symbolic(engine.vars)
-                    or val.as_uint(engine.vars) != 0
-                ]
-            ),
+            self._storage_states.setdefault(storage_use, storage_use),
         )
 
 
-@dataclass(eq=True, frozen=True)
 class InstIncCoverageState(InstCoverageState):
-    tx_num: int
-    total_tx_cnt: int
+    __slots__ = ("tx_num", "total_tx_cnt")
+
+    def __init__(
+        self,
+        contract: int,
+        contract_is_initialized: bool,
+        inst_addr: int,
+        tx_num: int,
+        total_tx_cnt: int,
+    ):
+        self.tx_num = tx_num
+        self.total_tx_cnt = total_tx_cnt
+        super().__init__(contract, contract_is_initialized, inst_addr)
 
 
 class InstIncCoverage(InstCoverage):
@@ -134,10 +176,13 @@ class InstIncCoverage(InstCoverage):
         super().__init__()
         self.total_tx_cnt = None
 
-    def get_state(self, inst_addr: int, **kwargs) -> InstIncCoverageState:
+    def get_state(
+        self, inst_addr: int, engine: MaatEngine
+    ) -> InstIncCoverageState:
+        ctr = self.world.current_contract
         return InstIncCoverageState(
-            self.world.current_contract.address,
-            self.world.current_contract.initialized,
+            ctr.address,
+            ctr.initialized,
             inst_addr,
             self.world.current_tx_num,
             self.total_tx_cnt,
@@ -151,10 +196,20 @@ class InstIncCoverage(InstCoverage):
         self.total_tx_cnt = len(tx_seq)
 
 
-@dataclass(eq=True, frozen=True)
 class InstTxSeqCoverageState(InstCoverageState):
-    tx_num: int
-    tx_seq: Optional[Tuple]
+    __slots__ = ("tx_num", "tx_seq")
+
+    def __init__(
+        self,
+        contract: int,
+        contract_is_initialized: bool,
+        inst_addr: int,
+        tx_num: int,
+        tx_seq: Optional[Tuple],
+    ):
+        self.tx_num = tx_num
+        self.tx_seq = tx_seq
+        super().__init__(contract, contract_is_initialized, inst_addr)
 
 
 class InstTxSeqCoverage(InstCoverage):
@@ -174,10 +229,13 @@ class InstTxSeqCoverage(InstCoverage):
         self.tx_seq: Optional[Tuple] = None
         self.threshold = threshold
 
-    def get_state(self, inst_addr: int, **kwargs) -> InstTxSeqCoverageState:
+    def get_state(
+        self, inst_addr: int, engine: MaatEngine
+    ) -> InstTxSeqCoverageState:
+        ctr = self.world.current_contract
         return InstTxSeqCoverageState(
-            self.world.current_contract.address,
-            self.world.current_contract.initialized,
+            ctr.address,
+            ctr.initialized,
             inst_addr,
             self.world.current_tx_num,
             self.tx_seq,
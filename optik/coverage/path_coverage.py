@@ -1,49 +1,55 @@
-import itertools
-from dataclasses import dataclass, field
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
 
 from maat import MaatEngine
 
 from .coverage import Coverage, CoverageState
 
 
-@dataclass(frozen=True)
 class PathCoverageState(CoverageState):
-    path: List[int]
+    __slots__ = ("path",)
 
-    def __eq__(self, other) -> bool:
-        return (
-            super(PathCoverageState, self).__eq__(other)
-            and self.path == other.path
-        )
-
-    def __hash__(self):
-        return hash(
-            tuple(self.path)
-            + (
-                self.contract,
-                self.contract_is_initialized,
-            )
-        )
+    def __init__(
+        self,
+        contract: int,
+        contract_is_initialized: bool,
+        path: Tuple[int, ...],
+    ):
+        self.path = path
+        super().__init__(contract, contract_is_initialized)
 
 
-@dataclass(frozen=False)
 class PathTree:
-    """Simple class that holds a tree of execution paths"""
+    """Simple class that holds a tree of execution paths. Most nodes are
+    leaves or have very few children, so nodes use __slots__ and only
+    allocate a dict once they get children
 
-    nodes: Dict[int, "PathThree"] = field(default_factory=lambda: {})
-    covered: int = 0
+    Attributes:
+        nodes: children nodes indexed by the address they branch to, or None
+        if the node has no children
+        covered: number of times a path going through this node was added
+    """
 
-    def add(self, path: List[int]) -> None:
+    __slots__ = ("nodes", "covered")
+
+    def __init__(self) -> None:
+        self.nodes: Optional[Dict[int, "PathTree"]] = None
+        self.covered: int = 0
+
+    def add(self, path: Sequence[int]) -> None:
         """Add a new path"""
-        self.covered += 1
-        if path:
-            addr = path[0]
-            if addr not in self.nodes:
-                self.nodes[addr] = PathTree()
-            self.nodes[addr].add(path[1:])
-
-    def get(self, path: List[int], default: int = 0) -> int:
+        node = self
+        node.covered += 1
+        for addr in path:
+            if node.nodes is None:
+                node.nodes = {}
+            child = node.nodes.get(addr)
+            if child is None:
+                child = PathTree()
+                node.nodes[addr] = child
+            node = child
+            node.covered += 1
+
+    def get(self, path: Sequence[int], default: int = 0) -> int:
         """Get number of times a given path was covered
 
         :param path: path for which to return coverage
@@ -52,17 +58,115 @@ class PathTree:
         if isinstance(path, PathCoverageState):
             path = path.path
 
-        if path:
-            addr = path[0]
-            if addr in self.nodes:
-                return self.nodes[addr].get(path[1:], default)
-            return default
-        return self.covered
-
-    def __contains__(self, item: List[int]) -> bool:
+        node = self
+        for addr in path:
+            if node.nodes is None:
+                return default
+            child = node.nodes.get(addr)
+            if child is None:
+                return default
+            node = child
+        return node.covered
+
+    def __contains__(self, item: Sequence[int]) -> bool:
         return self.get(item) > 0
 
 
+class RelaxedPathTree(PathTree):
+    """A tree of execution paths in which a path is considered covered if it
+    is a subpath (ordered combination) of a path that was added. For example
+    if [3,2,1] was added, then [3,1] is covered.
+
+    Only the added paths are stored, subpaths are matched when queried
+    instead of adding all of them to the tree, since a path has an
+    exponential number of subpaths. To avoid visiting the whole tree on each
+    query, every node records the addresses and the length of the longest
+    path found below it, and subtrees that can't complete a match are skipped
+
+    Attributes:
+        addrs: addresses of all the branches below this node
+        height: length of the longest path below this node
+    """
+
+    __slots__ = ("addrs", "height")
+    # Children of relaxed trees are relaxed trees as well
+    nodes: Optional[Dict[int, "RelaxedPathTree"]]  # type: ignore
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.addrs: Set[int] = set()
+        self.height: int = 0
+
+    def add(self, path: Sequence[int]) -> None:
+        """Add a new path"""
+        # Nodes along the path, nodes[i] is reached after i branches
+        nodes = [self]
+        node = self
+        for addr in path:
+            if node.nodes is None:
+                node.nodes = {}
+            child = node.nodes.get(addr)
+            if child is None:
+                child = RelaxedPathTree()
+                node.nodes[addr] = child
+            node = child
+            nodes.append(node)
+
+        for depth, node in enumerate(nodes):
+            node.covered += 1
+            node.height = max(node.height, len(path) - depth)
+        # path[i] is below nodes[0] to nodes[i]. The addresses of a node
+        # include those of its children, so once an address is found in a
+        # node it is already in all the nodes above it
+        for i in range(len(path) - 1, -1, -1):
+            addr = path[i]
+            for depth in range(i, -1, -1):
+                if addr in nodes[depth].addrs:
+                    break
+                nodes[depth].addrs.add(addr)
+
+    def _matches(self, path: Sequence[int]) -> Iterator["RelaxedPathTree"]:
+        """Yield the nodes at which added paths contain 'path' as a subpath.
+        All paths going through such a node contain 'path', and each added
+        path goes through at most one of them"""
+        if isinstance(path, PathCoverageState):
+            path = path.path
+
+        # Nodes to visit, with the number of addresses of 'path' that were
+        # matched on the way to them. Matching addresses as soon as possible
+        # finds all added paths of which 'path' is a subpath
+        todo: List[Tuple[RelaxedPathTree, int]] = [(self, 0)]
+        while todo:
+            node, matched = todo.pop()
+            if matched == len(path):
+                yield node
+                continue
+            # Skip subtrees that can't hold the rest of 'path'
+            if (
+                node.nodes is None
+                or node.height < len(path) - matched
+                or not node.addrs.issuperset(path[matched:])
+            ):
+                continue
+            for addr, child in node.nodes.items():
+                todo.append(
+                    (child, matched + 1 if addr == path[matched] else matched)
+                )
+
+    def get(self, path: Sequence[int], default: int = 0) -> int:
+        """Get number of added paths of which 'path' is a subpath
+
+        :param path: path for which to return coverage
+        :param default: default value to return if 'path' is not covered
+        """
+        res = sum(node.covered for node in self._matches(path))
+        return res if res else default
+
+    def __contains__(self, item: Sequence[int]) -> bool:
+        # Stop at the first match instead of counting all of them
+        return any(node.covered for node in self._matches(item))
+
+
 class PathCoverage(Coverage):
     """A class for computing path coverage in a contract's code
 
@@ -77,17 +181,20 @@ class PathCoverage(Coverage):
     def __init__(self) -> None:
         super().__init__()
         self.covered = PathTree()
-        # Current path: list of symbolic branches that were taken
-        self.current_path: List[int] = []
+        # Current path: symbolic branches that were taken
+        self.current_path: Tuple[int, ...] = ()
 
-    def get_state(self, inst_addr: int, **kwargs) -> PathCoverageState:
+    def get_state(
+        self, inst_addr: int, engine: MaatEngine
+    ) -> PathCoverageState:
         """Get coverage state for the path consisting in the current
         path + a branch to 'inst_addr'
         """
+        ctr = self.world.current_contract
         return PathCoverageState(
-            self.world.current_contract.address,
-            self.world.current_contract.initialized,
-            self.current_path + [inst_addr],
+            ctr.address,
+            ctr.initialized,
+            self.current_path + (inst_addr,),
         )
 
     def record_branch(self, m: MaatEngine) -> None:
@@ -98,24 +205,12 @@ class PathCoverage(Coverage):
         taken_target = (
             b.target.as_uint(m.vars) if b.taken else b.next.as_uint(m.vars)
         )
-        self.current_path.append(taken_target)
+        self.current_path += (taken_target,)
         self.covered.add(self.current_path)
 
     def set_input_uid(self, input_uid: str) -> None:
         super().set_input_uid(input_uid)
-        self.current_path = []
-
-
-def all_subpaths(path: List[int]) -> List[List[int]]:
-    """Return all subpaths (ordered combinations) of 'path'.
-    For example if path = [3,2,1] it shall return
-    [[1], [2], [3], [3,2], [2,1], [3,1], [3,2,1]]
-    """
-    res = []
-    for L in range(1, len(path) + 1):
-        for subpath in itertools.combinations(path, L):
-            res.append(list(subpath))
-    return res
+        self.current_path = ()
 
 
 class RelaxedPathCoverage(PathCoverage):
@@ -126,15 +221,4 @@ class RelaxedPathCoverage(PathCoverage):
 
     def __init__(self) -> None:
         super().__init__()
-
-    def record_branch(self, m: MaatEngine) -> None:
-        """Record execution of a symbolic branch and save the bifurcation
-        point information"""
-
-        super().record_branch(m)
-
-        # In relaxed mode we also add sub paths to coverage tree
-        # When running this, super() has already updated the current
-        # path with the branch being taken
-        for p in all_subpaths(self.current_path):
-            self.covered.add(p)
+        self.covered = RelaxedPathTree()
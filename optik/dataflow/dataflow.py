@@ -1,4 +1,4 @@
-from typing import List, Optional, Set
+from typing import Dict, List, Optional
 
 from slither.core.declarations.function import Function
 from slither.printers.guidance.echidna import _extract_function_relations
@@ -6,6 +6,9 @@ from slither.slither import SlitherCore
 
 from ..common.exceptions import DataflowException
 
+# Visibilities of functions that can be called in transactions
+_CALLABLE_VISIBILITIES = frozenset(("public", "external"))
+
 
 class DataflowNode:
     """A node representing a function in a DataflowGraph
@@ -14,19 +17,21 @@ class DataflowNode:
         func: the function represented by the node
         children: functions that use data modified by this function
         parents: functions that modify data used by this function
+
+    Children and parents are dicts indexed by node id rather than sets, so
+    that they are iterated in insertion order. This makes the tx sequences
+    generated from the graph deterministic
     """
 
     def __init__(self, func: Function):
         self.func = func
-        self.children: Set[DataflowNode] = set()
-        self.parents: Set[DataflowNode] = set()
+        self.children: Dict[int, DataflowNode] = {}
+        self.parents: Dict[int, DataflowNode] = {}
 
     def __str__(self) -> str:
         res = f"{self.func.name}:"
-        res += f"\tImpacts: {', '.join([c.func.name for c in self.children])}"
-        res += (
-            f"\tImpacted by: {', '.join([p.func.name for p in self.parents])}"
-        )
+        res += f"\tImpacts: {', '.join([c.func.name for c in self.children.values()])}"
+        res += f"\tImpacted by: {', '.join([p.func.name for p in self.parents.values()])}"
         return res
 
 
@@ -39,21 +44,23 @@ class DataflowGraph:
 
     def __init__(self) -> None:
         self.nodes: List[DataflowNode] = []
+        # Nodes indexed by the id of their function. Functions are
+        # identified by identity, not equality
+        self._nodes_by_func: Dict[int, DataflowNode] = {}
 
     def add_function(self, func: Function) -> None:
         """Add a node for function 'func'. If the function is already
         present in the graph, does nothing"""
-        if any(x.func is func for x in self.nodes):
+        if id(func) in self._nodes_by_func:
             return
-        self.nodes.append(DataflowNode(func))
+        node = DataflowNode(func)
+        self.nodes.append(node)
+        self._nodes_by_func[id(func)] = node
 
     def get_node(self, func: Function) -> Optional[DataflowNode]:
         """Returns the node corresponding to function 'func', or None
         if no such node exists"""
-        for n in self.nodes:
-            if n.func is func:
-                return n
-        return None
+        return self._nodes_by_func.get(id(func))
 
     def add_dataflow(self, src: Function, dst: Function) -> None:
         """Add a dataflow dependency between two functions
@@ -63,9 +70,10 @@ class DataflowGraph:
         """
         s = self.get_node(src)
         d = self.get_node(dst)
-        if s and d:
-            s.children.add(d)
-            d.parents.add(s)
+        # Edges are usually reported twice, from both of their ends
+        if s and d and id(d) not in s.children:
+            s.children[id(d)] = d
+            d.parents[id(s)] = s
 
     def __str__(self) -> str:
         return "\n".join([str(n) for n in self.nodes])
@@ -77,10 +85,7 @@ def ignore_func(func: Function) -> bool:
         - constructors
         - private or internal functions
     """
-    return func.is_constructor or func.visibility not in [
-        "public",
-        "external",
-    ]
+    return func.is_constructor or func.visibility not in _CALLABLE_VISIBILITIES
 
 
 def get_base_dataflow_graph(
@@ -93,8 +98,9 @@ def get_base_dataflow_graph(
         target contract
     """
     res = DataflowGraph()
-    rels = _extract_function_relations(slither)
-    rels = rels[contract_name]  # TODO KeyError
+    rels = _extract_function_relations(slither).get(contract_name)
+    if rels is None:
+        raise DataflowException(f"No contract named '{contract_name}'")
 
     contracts = slither.get_contract_from_name(contract_name)
     if len(contracts) > 1:
@@ -105,21 +111,30 @@ def get_base_dataflow_graph(
         raise DataflowException(f"No contract named '{contract_name}'")
     contract = contracts[0]
 
+    # The same signatures appear in the dependencies of many functions, so
+    # look each of them up only once in the contract
+    funcs: Dict[str, Optional[Function]] = {}
+
+    def get_function(sig: str) -> Optional[Function]:
+        if sig not in funcs:
+            funcs[sig] = contract.get_function_from_signature(sig)
+        return funcs[sig]
+
     # Add functions to the dataflow graph
     for func, deps in rels.items():
         # Add all function dependencies
-        func = contract.get_function_from_signature(func)
+        func = get_function(func)
         if ignore_func(func):
             continue
         res.add_function(func)
         for dst in deps["impacts"]:
-            dst = contract.get_function_from_signature(dst)
+            dst = get_function(dst)
             if dst is None or ignore_func(dst):
                 continue
             res.add_function(dst)
             res.add_dataflow(func, dst)
         for src in deps["is_impacted_by"]:
-            src = contract.get_function_from_signature(src)
+            src = get_function(src)
             if src is None or ignore_func(src):
                 continue
             res.add_function(src)
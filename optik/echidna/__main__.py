@@ -1,12 +1,15 @@
 import argparse
+import functools
+import hashlib
+import json
 import logging
 import os
 import sys
 import tempfile
+import threading
 import time
 from dataclasses import dataclass
-from datetime import datetime
-from typing import List, Optional, Set, NoReturn
+from typing import Dict, List, Optional, Set, NoReturn, Type
 
 from slither.exceptions import SlitherError
 from slither.slither import Slither
@@ -33,6 +36,7 @@ from ..common.logger import (
     init_logging,
     set_logging_level,
 )
+from ..common.solver import SolverCache
 from ..common.util import count_files_in_dir
 from ..corpus.generator import (
     EchidnaCorpusGenerator,
@@ -50,6 +54,17 @@ from ..coverage import (
 )
 
 
+# Coverage classes for each coverage mode that takes no parameter
+COVERAGE_MODES: Dict[str, Type[Coverage]] = {
+    "inst": InstCoverage,
+    "inst-tx": InstTxCoverage,
+    "path": PathCoverage,
+    "path-relaxed": RelaxedPathCoverage,
+    "inst-sg": InstSgCoverage,
+    "inst-inc": InstIncCoverage,
+}
+
+
 def handle_argparse_error(err: ArgumentParsingError) -> None:
     print(f"error: {err.msg}")
     print(err.help_str)
@@ -78,11 +93,7 @@ def run_hybrid_echidna(arguments: List[str]) -> None:
         return
 
     max_seq_len = args.seq_len
-    try:
-        deployer = int(args.deployer, 16)
-    except ValueError:
-        logger.error(f"Invalid deployer address: {args.deployer}")
-        return
+    deployer = int(args.deployer, 16)
 
     echidna_init_file = get_echidna_init_file(args)
 
@@ -108,20 +119,10 @@ def run_hybrid_echidna(arguments: List[str]) -> None:
 
     # Coverage tracker for the whole fuzzing session
     cov: Coverage
-    if args.cov_mode == "inst":
-        cov = InstCoverage()
-    elif args.cov_mode == "inst-tx":
-        cov = InstTxCoverage()
-    elif args.cov_mode == "path":
-        cov = PathCoverage()
-    elif args.cov_mode == "path-relaxed":
-        cov = RelaxedPathCoverage()
-    elif args.cov_mode == "inst-sg":
-        cov = InstSgCoverage()
-    elif args.cov_mode == "inst-inc":
-        cov = InstIncCoverage()
-    elif args.cov_mode == "inst-tx-seq":
+    if args.cov_mode == "inst-tx-seq":
         cov = InstTxSeqCoverage(args.incremental_threshold)
+    elif args.cov_mode in COVERAGE_MODES:
+        cov = COVERAGE_MODES[args.cov_mode]()
     else:
         raise GenericException(f"Unsupported coverage mode: {args.cov_mode}")
 
@@ -140,8 +141,12 @@ def run_hybrid_echidna(arguments: List[str]) -> None:
         slither = Slither(args.FILES[0])
         gen = EchidnaCorpusGenerator(args.contract, slither)
 
-    # Set of corpus files we have already processed
+    # Names of the corpus files we have already processed
     seen_files: Set[str] = set()
+    # Hashes of the tx sequences we have already replayed
+    seen_inputs: Set[bytes] = set()
+    # Solver results shared by all iterations
+    solver_cache = SolverCache()
 
     # Main fuzzing+symexec loop
     iter_cnt = 0
@@ -206,11 +211,9 @@ def run_hybrid_echidna(arguments: List[str]) -> None:
 
         # Run echidna fuzzing campaign
         logger.info(f"Running echidna campaign #{iter_cnt} ...")
-        start_time = datetime.now()
+        start_time = time.monotonic_ns()
         p = run_echidna_campaign(args)
-        display.fuzz_total_time += int(
-            (datetime.now() - start_time).total_seconds() * 1000
-        )
+        display.fuzz_total_time += (time.monotonic_ns() - start_time) // 1000000
         # Note: return code is not a reliable error indicator for Echidna
         # so we check stderr to detect potential errors running Echidna
         if p.stderr:
@@ -270,19 +273,15 @@ def run_hybrid_echidna(arguments: List[str]) -> None:
             break
 
         # Terminal display
-        new_echidna_inputs_cnt = len(
-            [
-                f
-                for f in new_inputs
-                if not os.path.basename(f).startswith("optik")
-            ]
+        new_echidna_inputs_cnt = sum(
+            1 for f in new_inputs if not os.path.basename(f).startswith("optik")
         )
         display.fuzz_total_cases_cnt += new_echidna_inputs_cnt
         display.fuzz_last_cases_cnt = new_echidna_inputs_cnt
         # Replay new corpus inputs symbolically
         cov.bifurcations = []
         replay_inputs(
-            new_inputs,
+            filter_duplicate_inputs(new_inputs, seen_inputs),
             contract_file,
             deployer,
             cov,
@@ -290,7 +289,9 @@ def run_hybrid_echidna(arguments: List[str]) -> None:
         )
 
         # Find inputs to reach new code
-        new_inputs_cnt, timeout_cnt = generate_new_inputs(cov, args)
+        new_inputs_cnt, timeout_cnt = generate_new_inputs(
+            cov, args, solver_cache=solver_cache
+        )
         if timeout_cnt > 0:
             logger.warning(f"Timed out on {timeout_cnt} cases")
         if new_inputs_cnt > 0:
@@ -322,8 +323,8 @@ def run_hybrid_echidna_with_display(args: List[str]) -> None:
         # Indicate that hybrid echidna finished and
         # wait for user to manually close display
         display.notify_finished()
-        while True:
-            time.sleep(0.2)
+        # Block until the user presses Ctrl+C, without waking up periodically
+        threading.Event().wait()
     # Handle many errors to gracefully stop terminal display
     except ArgumentParsingError as e:
         argparse_err = e
@@ -345,21 +346,51 @@ def run_hybrid_echidna_with_display(args: List[str]) -> None:
 
 
 def pull_new_corpus_files(cov_dir: str, seen_files: Set[str]) -> List[str]:
-    """Return files in 'cov_dir' that aren't present in 'seen_files'.
-    Before returning, 'seen_files' is updated to contain the list of new files
-    that the function returns
+    """Return files in 'cov_dir' whose name isn't present in 'seen_files'.
+    Before returning, 'seen_files' is updated to contain the names of the new
+    files that the function returns
+    """
+    res = []
+    with os.scandir(cov_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".txt") or entry.name in seen_files:
+                continue
+            seen_files.add(entry.name)
+            res.append(entry.path)
+    return res
+
+
+def filter_duplicate_inputs(
+    corpus_files: List[str], seen_inputs: Set[bytes]
+) -> List[str]:
+    """Return files in 'corpus_files' whose tx sequence isn't present in
+    'seen_inputs', keeping only one file for each sequence. Before returning,
+    'seen_inputs' is updated to contain the sequences of the returned files
+
+    :param corpus_files: Echidna corpus files
+    :param seen_inputs: hashes of tx sequences
     """
     res = []
-    for corpus_file_name in os.listdir(cov_dir):
-        corpus_file = str(os.path.join(cov_dir, corpus_file_name))
-        if not corpus_file.endswith(".txt") or corpus_file in seen_files:
+    for corpus_file in corpus_files:
+        with open(corpus_file, "rb") as f:
+            data = json.loads(f.read())
+        # Hash a canonical serialization, the same sequence can be
+        # serialized differently in different files
+        h = hashlib.sha256(
+            json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
+        ).digest()
+        if h in seen_inputs:
+            logger.debug(f"Skipping duplicate input: {corpus_file}")
             continue
-        seen_files.add(corpus_file)
+        seen_inputs.add(h)
         res.append(corpus_file)
     return res
 
 
-def parse_arguments(args: List[str]) -> argparse.Namespace:
+@functools.lru_cache(maxsize=None)
+def _get_argument_parser() -> argparse.ArgumentParser:
+    """Return the hybrid-echidna argument parser. It is built only once"""
+
     class ArgParser(argparse.ArgumentParser):
         """Custom argument parser that doesn't exit on invalid arguments but
         raises a custom exception for Optik to handle"""
@@ -377,6 +408,12 @@ def parse_arguments(args: List[str]) -> argparse.Namespace:
     def auto_int(x: str) -> int:
         return int(x, 0)
 
+    def hex_address(x: str) -> str:
+        # Addresses are passed as is to Echidna, only check that they are
+        # valid so that invalid ones are reported before running anything
+        int(x, 16)
+        return x
+
     # Echidna arguments
     parser.add_argument(
         "FILES", type=str, nargs="*", help="Solidity files to analyze"
@@ -439,7 +476,7 @@ def parse_arguments(args: List[str]) -> argparse.Namespace:
 
     parser.add_argument(
         "--contract-addr",
-        type=str,
+        type=hex_address,
         help="Address to deploy the contract to test (hex)",
         default="00A329C0648769A73AFAC7F9381E08FB43DBEA72",
         metavar="ADDRESS",
@@ -447,7 +484,7 @@ def parse_arguments(args: List[str]) -> argparse.Namespace:
 
     parser.add_argument(
         "--deployer",
-        type=str,
+        type=hex_address,
         help="Address of the deployer of the contract to test (hex)",
         default="30000",
         metavar="ADDRESS",
@@ -455,7 +492,7 @@ def parse_arguments(args: List[str]) -> argparse.Namespace:
 
     parser.add_argument(
         "--sender",
-        type=str,
+        type=hex_address,
         nargs="*",
         default=["10000", "20000", "30000"],
         help="Addresses to use for the transactions sent during testing (hex)",
@@ -482,15 +519,7 @@ def parse_arguments(args: List[str]) -> argparse.Namespace:
         "--cov-mode",
         type=str,
         help="Coverage mode to use",
-        choices=[
-            "inst",
-            "inst-tx",
-            "path",
-            "path-relaxed",
-            "inst-sg",
-            "inst-inc",
-            "inst-tx-seq",
-        ],
+        choices=[*COVERAGE_MODES, "inst-tx-seq"],
         default="inst-tx-seq",
         # metavar="MODE",
     )
@@ -535,7 +564,15 @@ def parse_arguments(args: List[str]) -> argparse.Namespace:
         help="Disable the beautiful terminal display",
     )
 
-    return parser.parse_args(args)
+    return parser
+
+
+def parse_arguments(args: List[str]) -> argparse.Namespace:
+    res = _get_argument_parser().parse_args(args)
+    # The default senders list is shared by all calls to parse_args(), copy it
+    # since new senders are appended to it while fuzzing
+    res.sender = list(res.sender)
+    return res
 
 
 # We use a global for the fuzzing result because we need to
@@ -1,5 +1,6 @@
 import json
 import os
+import re
 import tempfile
 import yaml
 import argparse
@@ -233,6 +234,21 @@ def load_tx_sequence(filename: str) -> List[AbstractTx]:
         return res
 
 
+# Matches the '_call' key that every serialized Echidna transaction has
+# exactly once
+_CALL_KEY_REGEX = re.compile(rb'(?<!\\)"_call"\s*:')
+
+
+def count_txs_in_corpus_file(filename: str) -> int:
+    """Return the number of transactions in an Echidna corpus file. This
+    counts the transactions' '_call' keys instead of parsing the whole file
+
+    :param filename: corpus file to inspect
+    """
+    with open(filename, "rb") as f:
+        return len(_CALL_KEY_REGEX.findall(f.read()))
+
+
 def update_argument(arg: Dict, arg_name: str, new_model: VarContext) -> None:
     """Update an argument value in a transaction according to a
     symbolic model. The argument is modified **in-place**
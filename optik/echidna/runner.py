@@ -2,7 +2,7 @@ import argparse
 import json
 import os
 import subprocess
-from datetime import datetime
+import time
 from typing import List, Optional, Tuple
 
 from maat import (
@@ -16,6 +16,7 @@ from maat import (
 from .display import display
 from .interface import load_tx_sequence, store_new_tx_sequence
 from ..common.logger import logger
+from ..common.solver import SolverCache
 from ..common.world import AbstractTx, EVMWorld
 from ..coverage import Coverage
 from ..common.exceptions import EchidnaException, WorldException
@@ -147,7 +148,10 @@ def init_world(world: EVMWorld, init_file: str) -> None:
 
 
 def generate_new_inputs(
-    cov: Coverage, args: argparse.Namespace, solve_duplicates: bool = False
+    cov: Coverage,
+    args: argparse.Namespace,
+    solve_duplicates: bool = False,
+    solver_cache: Optional[SolverCache] = None,
 ) -> Tuple[int, int]:
     """Generate new inputs to increase code coverage, base on
     existing coverage
@@ -157,6 +161,8 @@ def generate_new_inputs(
     'sender' values for transactions, those are included in the echidna
     list of possible senders
     :param solve_duplicates: forces to generate inputs even for similar bifurcations
+    :param solver_cache: optional cache of previous solver results, used to skip
+    queries that are known to be unsatisfiable or that were already solved
     :return: tuple: (number of new inputs found, number of solver timeouts)
     """
 
@@ -198,41 +204,59 @@ def generate_new_inputs(
             continue
 
         logger.info(f"Solving {i+1} of {count} ({round((i/count)*100, 2)}%)")
-        s = Solver()
-        if args.solver_timeout:
-            s.timeout = args.solver_timeout
-
-        # Add path constraints in
-        for path_constraint in bif.path_constraints:
-            s.add(path_constraint)
-        # Add constraint to branch to new code
-        logger.debug(
-            f"Solving alt target constraint: {bif.alt_target_constraint}"
-        )
-        s.add(bif.alt_target_constraint)
+        # Terminal display
+        display.update_avg_path_constraints(len(bif.path_constraints) + 1)
 
-        start_time = datetime.now()
-        solved = s.check()
-        display.update_solving_time(
-            int((datetime.now() - start_time).total_seconds() * 1000)
-        )
-        if solved:
+        # Look for a previous result for the same constraints
+        model: Optional[VarContext] = None
+        if solver_cache is not None:
+            cache_key = SolverCache.key(
+                (*bif.path_constraints, bif.alt_target_constraint)
+            )
+            if solver_cache.is_unsat(cache_key):
+                logger.debug("Skipping constraints known to be unsatisfiable")
+                continue
+            model = solver_cache.get_model(cache_key)
+
+        if model is None:
+            s = Solver()
+            if args.solver_timeout:
+                s.timeout = args.solver_timeout
+
+            # Add path constraints in
+            for path_constraint in bif.path_constraints:
+                s.add(path_constraint)
+            # Add constraint to branch to new code
+            logger.debug(
+                f"Solving alt target constraint: {bif.alt_target_constraint}"
+            )
+            s.add(bif.alt_target_constraint)
+
+            start_time = time.monotonic_ns()
+            solved = s.check()
+            display.update_solving_time(
+                (time.monotonic_ns() - start_time) // 1000000
+            )
+            if solved:
+                model = s.get_model()
+                if solver_cache is not None:
+                    solver_cache.add_sat(cache_key, model)
+            elif s.did_time_out:
+                timeout_cnt += 1
+                # Terminal display
+                display.sym_total_solver_timeouts += 1
+            elif solver_cache is not None:
+                solver_cache.add_unsat(cache_key)
+
+        if model is not None:
             success_cnt += 1
             if bif in unique_bifurcations:
                 unique_bifurcations.remove(bif)
-            model = s.get_model()
             # Serialize the new input discovered
             store_new_tx_sequence(bif.input_uid, model)
             _add_new_senders(model, args)
             # Terminal display
             display.sym_total_inputs_solved += 1
-        elif s.did_time_out:
-            timeout_cnt += 1
-            # Terminal display
-            display.sym_total_solver_timeouts += 1
-
-        # Terminal display
-        display.update_avg_path_constraints(len(bif.path_constraints) + 1)
 
     return (
         success_cnt,
@@ -0,0 +1,89 @@
+from typing import List, Tuple
+
+from maat import Cst, Value, Var, VarContext
+
+from optik.common.abi import (
+    fold_constants,
+    func_signature,
+    function_call,
+    selector,
+)
+
+
+def concat(values: List[Value]) -> Tuple[int, int]:
+    """Return the total size in bits and the value of concrete 'values'
+    concatenated together"""
+    size, res = 0, 0
+    for v in values:
+        size += v.size
+        res = (res << v.size) | v.as_uint()
+    return size, res
+
+
+def test_fold_constants_max_size():
+    data = [Cst(128, 1), Cst(128, 2), Cst(64, 3), Cst(8, 4)]
+    res = fold_constants(data)
+    # The third value would make the first run cross 256 bits
+    assert [v.size for v in res] == [256, 72]
+    assert concat(res) == concat(data)
+
+
+def test_fold_constants_symbolic():
+    data = [Cst(8, 1), Cst(8, 2), Var(8, "x"), Cst(8, 3)]
+    res = fold_constants(data)
+    assert [v.size for v in res] == [16, 8, 8]
+    assert concat([res[0]]) == concat(data[:2])
+    assert res[1].is_symbolic(VarContext())
+    assert res[2].as_uint() == 3
+
+
+def test_fold_constants_wide_value():
+    wide = Cst(512, "1" + "0" * 127, 16)
+    data = [Cst(8, 1), wide, Cst(8, 2)]
+    res = fold_constants(data)
+    # Values wider than max_size are kept as is and end runs
+    assert [v.size for v in res] == [8, 512, 8]
+    assert concat(res) == concat(data)
+
+
+def test_fold_constants_short_run():
+    # Runs of 64 bits or less, such as the padding of short bytes
+    data = [Cst(8, 0x61), Cst(8, 0x62), Cst(48, 0)]
+    res = fold_constants(data)
+    assert [v.size for v in res] == [64]
+    assert concat(res) == concat(data)
+    data = [Cst(8, 1), Var(8, "x"), Cst(8, 2)]
+    res = fold_constants(data)
+    assert [v.size for v in res] == [8, 8, 8]
+    assert concat([res[0]]) == (8, 1)
+    assert concat([res[2]]) == (8, 2)
+
+
+def test_function_call_short_padding():
+    # A single padding byte is folded into an 8 bits constant
+    ctx = VarContext()
+    data = function_call("f", "(bytes31)", ctx, "tx", [0x61] * 31)
+    assert concat(data[-1:]) == (8, 0)
+    for spec, args in [
+        ("(uint192)", [1]),
+        ("(bytes32,bytes4,bytes31)", [[0x61] * 32, [0x62] * 4, [0x63] * 31]),
+        ("(bytes)", [[0x61] * 30]),
+        ("(string)", [[0x61] * 29]),
+    ]:
+        # Must not raise
+        function_call("f", spec, VarContext(), "tx", *args)
+
+
+def test_function_call_selector():
+    ctx = VarContext()
+    data = function_call("f", "(uint8,uint256)", ctx, "tx", 1, 2)
+    # Coverage tracking reads the function selector from the first value
+    assert data[0].size == 32
+    assert (
+        data[0].as_uint()
+        == selector(func_signature("f", "(uint8,uint256)")).as_uint()
+    )
+    # Padding is folded, concolic arguments are kept
+    assert [v.size for v in data[1:]] == [248, 8, 256]
+    assert data[2].is_symbolic(VarContext())
+    assert data[3].is_symbolic(VarContext())
@@ -0,0 +1,68 @@
+import itertools
+import random
+from typing import List
+
+from optik.coverage.path_coverage import PathTree, RelaxedPathTree
+
+
+def all_subpaths(path: List[int]) -> List[List[int]]:
+    """Return all ordered combinations of addresses in 'path'. Relaxed path
+    coverage used to add all of them to a PathTree for each recorded path"""
+    return [
+        list(subpath)
+        for n in range(1, len(path) + 1)
+        for subpath in itertools.combinations(path, n)
+    ]
+
+
+def random_path(rng: random.Random, min_len: int, max_len: int) -> List[int]:
+    # Few distinct addresses so that queried paths are often covered
+    return [rng.randrange(4) for _ in range(rng.randint(min_len, max_len))]
+
+
+def test_relaxed_path_tree_subpath():
+    tree = RelaxedPathTree()
+    tree.add([3, 2, 1])
+    assert [3, 1] in tree
+    assert [3, 2, 1] in tree
+    assert [1, 3] not in tree
+    assert [3, 2, 1, 0] not in tree
+
+
+def test_relaxed_path_tree_matches_all_subpaths():
+    """Check that a RelaxedPathTree covers exactly the paths covered by a
+    PathTree in which all subpaths of the recorded paths were added"""
+    rng = random.Random(46541521)
+    for _ in range(50):
+        relaxed = RelaxedPathTree()
+        expanded = PathTree()
+        for _ in range(rng.randint(1, 5)):
+            # Recorded paths always contain at least one branch
+            path = random_path(rng, 1, 8)
+            relaxed.add(path)
+            for subpath in all_subpaths(path):
+                expanded.add(subpath)
+        for _ in range(100):
+            query = random_path(rng, 0, 5)
+            assert (query in relaxed) == (query in expanded), query
+
+
+def is_subpath(subpath: List[int], path: List[int]) -> bool:
+    addrs = iter(path)
+    return all(addr in addrs for addr in subpath)
+
+
+def test_relaxed_path_tree_counts():
+    """Check that RelaxedPathTree.get() counts all the recorded paths of
+    which a path is a subpath, although subtrees are pruned"""
+    rng = random.Random(46541521)
+    for _ in range(50):
+        tree = RelaxedPathTree()
+        paths = [random_path(rng, 1, 10) for _ in range(rng.randint(1, 8))]
+        for path in paths:
+            tree.add(path)
+        for _ in range(100):
+            query = random_path(rng, 0, 5)
+            expected = sum(is_subpath(query, path) for path in paths)
+            assert tree.get(query) == expected, query
+            assert (query in tree) == (expected > 0), query